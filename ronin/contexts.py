@@ -20,8 +20,6 @@ from .utils.types import verify_type
 from .utils.argparse import ArgumentParser
 from .utils.messages import error
 from .utils.collections import StrictList, StrictDict
-from io import StringIO
-from collections import OrderedDict
 import threading, sys, inspect, os
 
 
@@ -206,13 +204,9 @@ class Context(object):
 
     def __unicode__(self):
         # Python 2
-        f = StringIO()
-        try:
-            self._write(f)
-            v = f.getvalue()
-        finally:
-            f.close()
-        return v
+        from .utils.strings import stringify
+        return ''.join('{}={}\n'.format(k, stringify(v))
+                       for k, v in sorted(self._all.items()) if not k.startswith('_'))
 
     def __enter__(self):
         self._push_thread_local()
@@ -255,12 +249,20 @@ class Context(object):
         if '.' not in name:
             return default
         namespace_name, name = name.split('.', 1)
-        try:
-            namespace = getattr(self, namespace_name)
-            return getattr(namespace, name)
-        except NotInContextException:
+        if name in _Namespace._LOCAL:
             return default
 
+        # Walk up the contexts directly, so that we don't create namespaces or raise exceptions
+        context = self
+        while context is not None:
+            namespace = context._namespaces.get(namespace_name)
+            if namespace is not None:
+                values = vars(namespace)
+                if name in values:
+                    return values[name]
+            context = context._parent
+        return default
+
     def fallback(self, value, name, default=None):
         """
         If the value is not None, returns it. Otherwise works identically to :meth:`get`.
@@ -291,32 +293,23 @@ class Context(object):
     
     @property
     def _all(self):
-        r = OrderedDict()
+        r = {}
         if self._parent:
             r.update(self._parent._all)
-        for namespace_name, namespace in sorted(self._namespaces.items()):
-            for k, v in sorted(namespace._all_local.items()):
+        for namespace_name, namespace in self._namespaces.items():
+            for k, v in namespace._all_local.items():
                 r['{}.{}'.format(namespace_name, k)] = v
         return r
 
-    def _write(self, f):
-        from .utils.strings import stringify
-        for k, v in self._all.items():
-            if not k.startswith('_'):
-                v = stringify(v)
-                f.write('{}={}\n'.format(k, v))
-
     def _push_thread_local(self):
         """
         Attaches this context to the current thread by pushing it on the stack.
         """
 
-        try:
-            stack = _thread_locals.ronin_context_stack
-        except AttributeError:
-            stack = _ContextStack()
-            _thread_locals.ronin_context_stack = stack
-        stack.push(self)
+        stack = getattr(_thread_locals, 'ronin_context_stack', None)
+        if stack is None:
+            stack = _thread_locals.ronin_context_stack = []
+        stack.append(self)
 
     @staticmethod
     def _peek_thread_local():
@@ -328,10 +321,8 @@ class Context(object):
         :rtype: :class:`Context`
         """
 
-        try:
-            return _thread_locals.ronin_context_stack.peek()
-        except AttributeError:
-            return None
+        stack = getattr(_thread_locals, 'ronin_context_stack', None)
+        return stack[-1] if stack else None
 
     @staticmethod
     def _pop_thread_local():
@@ -343,10 +334,8 @@ class Context(object):
         :rtype: :class:`Context`
         """
         
-        try:
-            _thread_locals.ronin_context_stack.pop()
-        except AttributeError:
-            return None
+        stack = getattr(_thread_locals, 'ronin_context_stack', None)
+        return stack.pop() if stack else None
 
 
 class ContextException(Exception):
@@ -407,7 +396,7 @@ class _Namespace(object):
 
     @property
     def _all(self):
-        r = OrderedDict()
+        r = {}
         if self._context._parent:
             parent = getattr(self._context._parent, self._name)
             r.update(parent._all)
@@ -416,8 +405,8 @@ class _Namespace(object):
 
     @property
     def _all_local(self):
-        r = OrderedDict()
-        for k, v in sorted(vars(self).items()):
+        r = {}
+        for k, v in vars(self).items():
             if (k not in self._LOCAL) and (not k.startswith('_')):
                 r[k] = v
         return r
@@ -432,32 +421,12 @@ class _Namespace(object):
 
     def __setattr__(self, name, value):
         if name not in self._LOCAL:
-            try:
-                if self._context._immutable:
-                    raise ImmutableContextException()
-            except AttributeError:
-                pass
+            context = self.__dict__.get('_context')
+            if (context is not None) and context._immutable:
+                raise ImmutableContextException()
         super(_Namespace, self).__setattr__(name, value)
 
 
-class _ContextStack(object):
-    """
-    Manages a stack of :class:`Context` instances.
-    """
-    
-    def __init__(self):
-        self._stack = StrictList(value_type=Context)
-    
-    def push(self, context):
-        self._stack.append(context)
-    
-    def peek(self):
-        return self._stack[-1] if len(self._stack) else None
-
-    def pop(self):
-        return self._stack.pop() if len(self._stack) else None
-
-
 class _ArgumentParser(ArgumentParser):
     def __init__(self, name, frame):
         from .utils.strings import stringify
@@ -15,7 +15,6 @@
 from __future__ import unicode_literals
 from .utils.strings import stringify, join_later
 from .utils.collections import StrictList
-from io import StringIO
 
 
 class Executor(object):
@@ -50,13 +49,9 @@ class Executor(object):
         f.write(stringify(self.command))
     
     def command_as_str(self, argument_filter=None):
-        f = StringIO()
-        try:
-            self.write_command(f, argument_filter)
-            v = f.getvalue()
-        finally:
-            f.close()
-        return v
+        parts = _Parts()
+        self.write_command(parts, argument_filter)
+        return ''.join(parts)
 
     def add_input(self, value):
         pass
@@ -108,3 +103,12 @@ class ExecutorWithArguments(Executor):
         else:
             value = join_later(value)
         self._arguments.append((append, to_filter, value))
+
+
+class _Parts(list):
+    """
+    A list that can stand in for a writable file, so that the written strings can be joined in one
+    go.
+    """
+
+    write = list.append
@@ -19,18 +19,19 @@ from .contexts import current_context, new_child_context
 from .projects import Project
 from .phases import Phase
 from .executors import Executor
+from .pkg_config import prefetch_packages
 from .utils.paths import join_path
 from .utils.strings import stringify, stringify_list
 from .utils.platform import which
 from .utils.collections import dedup, StrictDict
 from .utils.types import verify_type
 from .utils.messages import announce
-from io import StringIO
 from os import makedirs
 from subprocess import check_call, CalledProcessError
-from datetime import datetime
 from textwrap import wrap
-import sys, os, io
+from bisect import bisect_left
+from itertools import chain
+import sys, os, io, re, time
 
 
 # See:
@@ -76,6 +77,8 @@ def escape(value):
     """
     
     value = stringify(value)
+    if '$' not in value:
+        return value
     return value.replace('$', '$$')
 
 
@@ -89,8 +92,7 @@ def pathify(value):
     :rtype: str
     """
     
-    value = stringify(value)
-    return value.replace('$ ', '$$ ').replace(' ', '$ ').replace(':', '$:')
+    return _pathify(stringify(value))
 
 
 class NinjaFile(object):
@@ -129,13 +131,9 @@ class NinjaFile(object):
 
     def __unicode__(self):
         # Python 2
-        f = StringIO()
-        try:
-            self.write(f)
-            v = f.getvalue()
-        finally:
-            f.close()
-        return v
+        parts = []
+        self._write(parts.extend)
+        return ''.join(parts)
 
     @property
     def command(self):
@@ -194,9 +192,11 @@ class NinjaFile(object):
         make parent directories.
         """
         
-        output_path = self._project.output_path
-        path = self.path
+        self._generate(self.path)
+
+    def _generate(self, path):
         announce("Generating '{}'".format(path))
+        output_path = os.path.dirname(path)
         if not os.path.isdir(output_path):
             makedirs(output_path)
         with io.open(path, 'w', encoding=self.encoding) as f:
@@ -207,7 +207,9 @@ class NinjaFile(object):
         Deletes the Ninja file at :attr:`path` if it exists.
         """
         
-        path = self.path
+        self._remove(self.path)
+
+    def _remove(self, path):
         if os.path.isfile(path):
             os.remove(path)
 
@@ -219,8 +221,9 @@ class NinjaFile(object):
         :rtype: int
         """
 
-        self.generate()
+        # Resolve the path only once
         path = self.path
+        self._generate(path)
         with current_context() as ctx:
             verbose = ctx.get('cli.verbose', False)
         args = [self.command, '-f', path]
@@ -254,7 +257,7 @@ class NinjaFile(object):
                 check_call(args)
             except CalledProcessError as ex:
                 return ex.returncode
-        self.remove()
+        self._remove(path)
         return 0
 
     def delegate(self):
@@ -272,22 +275,26 @@ class NinjaFile(object):
         :type f: file-like
         """
         
+        self._write(f.writelines)
+
+    def _write(self, writelines):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
         with new_child_context() as ctx:
             columns = ctx.fallback(self.columns, 'ninja.file_columns', DEFAULT_COLUMNS)
             strict = ctx.fallback(self.strict, 'ninja.file_columns_strict', False)
             if strict and (columns is not None) and (columns < _MINIMUM_COLUMNS_STRICT):
                 columns = _MINIMUM_COLUMNS_STRICT
 
-            with _Writer(f, columns, strict) as w:
+            with _Writer(writelines, columns, strict) as w:
+                phase_outputs = StrictDict(key_type=str, value_type=list)
                 ctx.current.writer = w
-                ctx.current.phase_outputs = StrictDict(key_type=str, value_type=list)
+                ctx.current.phase_outputs = phase_outputs
                 ctx.current.project = self._project
-                ctx.current.project_outputs[self._project] = ctx.current.phase_outputs
+                ctx.current.project_outputs[self._project] = phase_outputs
                 
                 # Header
                 w.comment('Ninja file for {}'.format(self._project))
-                w.comment('Generated by Rōnin on {}'
-                          .format(datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')))
+                w.comment('Generated by Rōnin on {}'.format(timestamp))
                 if columns is not None:
                     w.comment('Columns: {:d} ({})'
                               .format(columns, 'strict' if strict else 'non-strict'))
@@ -295,29 +302,53 @@ class NinjaFile(object):
                 w.line()
                 w.line('builddir = {}'.format(pathify(self._project.output_path)))
                 
-                # Rules
-                for phase_name, phase in self._project.phases.items():
-                    verify_type(phase, Phase)
-                    self._write_rule(ctx, phase_name, phase)
-
-    def _write_rule(self, ctx, phase_name, phase):
-        phase_outputs = ctx.current.phase_outputs
+                # Run pkg-config for all phases at once, before we need the results
+                prefetch_packages(self._project.phases.values())
+
+                # Rules (dependencies are always written before the phases that use them)
+                for phase_name, phase, from_names in self._sort_phases():
+                    self._write_rule(ctx, w, phase_outputs, phase_name, phase, *from_names)
+
+    def _sort_phases(self):
+        # Iterative depth-first topological sort, in project order
+        ordered = []
+        done = {} # phase name -> False while its dependencies are being visited, True after
+        for root_name, root in self._project.phases.items():
+            if root_name in done:
+                continue
+            stack = [self._visit_phase(done, root_name, root)]
+            while stack:
+                phase_name, phase, from_names, dependencies = stack[-1]
+                for dependency_name, dependency in dependencies:
+                    dependency_done = done.get(dependency_name)
+                    if dependency_done is None:
+                        stack.append(self._visit_phase(done, dependency_name, dependency))
+                        break
+                    elif not dependency_done:
+                        raise ValueError('circular dependency between phases "{}" and "{}"'
+                                         .format(phase_name, dependency_name))
+                else:
+                    stack.pop()
+                    done[phase_name] = True
+                    ordered.append((phase_name, phase, from_names))
+        return ordered
 
-        # Check if already written
-        if phase_name in phase_outputs:
-            return
-        
+    def _visit_phase(self, done, phase_name, phase):
+        verify_type(phase, Phase)
         phase.apply()
+        done[phase_name] = False
+        
+        # From other phases
+        from_phases = [self._get_phases(phase, attr)
+                       for attr in ('inputs_from', 'rebuild_on_from', 'build_if_from')]
+        from_names = [[p_name for p_name, _ in phases] for phases in from_phases]
+        return phase_name, phase, from_names, chain.from_iterable(from_phases)
 
+    def _write_rule(self, ctx, w, phase_outputs, phase_name, phase, inputs_from, rebuild_on_from,
+                    build_if_from):
         ctx.current.phase_name = phase_name
         ctx.current.phase = phase
-        w = ctx.current.writer
 
-        # From other phases
-        inputs_from = self._get_phase_names(ctx, phase, 'inputs_from')
-        rebuild_on_from = self._get_phase_names(ctx, phase, 'rebuild_on_from')
-        build_if_from = self._get_phase_names(ctx, phase, 'build_if_from')
-        
         # Rule
         rule_name = phase_name.replace(' ', '_')
         w.line()
@@ -343,10 +374,8 @@ class NinjaFile(object):
                 w.line('deps = {}'.format(deps_type), 1)
 
         # Implicit dependencies
-        implicit_dependencies = phase.rebuild_on
-        for n in rebuild_on_from:
-            implicit_dependencies += [v.file for v in phase_outputs[n]]
-        implicit_dependencies = dedup(implicit_dependencies)
+        implicit_dependencies = dedup(chain(phase.rebuild_on,
+                                            _output_files(phase_outputs, rebuild_on_from)))
         if implicit_dependencies:
             implicit_dependencies = ' | {}'.format(' '.join(pathify(v)
                                                             for v in implicit_dependencies))
@@ -354,20 +383,16 @@ class NinjaFile(object):
             implicit_dependencies = ''
 
         # Order dependencies
-        order_dependencies = phase.build_if
-        for n in build_if_from:
-            order_dependencies += [v.file for v in phase_outputs[n]]
-        order_dependencies = dedup(order_dependencies)
+        order_dependencies = dedup(chain(phase.build_if,
+                                         _output_files(phase_outputs, build_if_from)))
         if order_dependencies:
             order_dependencies = ' || {}'.format(' '.join(pathify(v) for v in order_dependencies))
         else:
             order_dependencies = ''
             
         # Inputs
-        inputs = stringify_list(phase.inputs)
-        for n in inputs_from:
-            inputs += [v.file for v in phase_outputs[n]]
-        inputs = dedup(inputs)
+        inputs = dedup(chain(stringify_list(phase.inputs),
+                             _output_files(phase_outputs, inputs_from)))
         
         # Outputs
         combine_inputs, outputs = phase.get_outputs(inputs)
@@ -375,16 +400,20 @@ class NinjaFile(object):
         # Store outputs in state
         phase_outputs[phase_name] = outputs
         
+        # Everything after the inputs is the same for all build statements
+        line_end = implicit_dependencies + order_dependencies
+        phase_vars = list(phase.vars.items())
+
         def build(output, inputs):
-            line = 'build {}: {}'.format(pathify(output.file), rule_name)
+            # Inputs and outputs are already strings, so we can skip stringify
             if inputs:
-                line += ' ' + ' '.join([pathify(v) for v in inputs])
-            line += implicit_dependencies
-            line += order_dependencies
-            w.line(line)
+                w.line('build {}: {} {}{}'.format(_pathify(output.file), rule_name,
+                                                  ' '.join(map(_pathify, inputs)), line_end))
+            else:
+                w.line('build {}: {}{}'.format(_pathify(output.file), rule_name, line_end))
             
             # Vars
-            for var_name, var in phase.vars.items():
+            for var_name, var in phase_vars:
                 if hasattr(var, '__call__'):
                     var = var(output, inputs)
                 w.line('{} = {}'.format(var_name, var), 1)
@@ -398,96 +427,120 @@ class NinjaFile(object):
                 the_input = inputs[index]
                 build(output, [the_input])
 
-    def _get_phase_names(self, ctx, phase, attr):
-        phase_names = []
+    def _get_phases(self, phase, attr):
+        phases = []
         for value in getattr(phase, attr):
             p_name, p = self._project.get_phase_for(value, attr)
             if p is phase:
                 raise ValueError('{} contains self'.format(attr))
+            phases.append((p_name, p))
+        return phases
+
+
+def _pathify(value):
+    if (' ' not in value) and (':' not in value):
+        # Most paths need no escaping
+        return value
+    return value.replace('$ ', '$$ ').replace(' ', '$ ').replace(':', '$:')
 
-            phase_names.append(p_name)
-            
-            # Write this phase so we have results to collect
-            self._write_rule(ctx, p_name, p)
-            
-        return phase_names
+
+def _output_files(phase_outputs, phase_names):
+    for phase_name in phase_names:
+        for output in phase_outputs[phase_name]:
+            yield output.file
 
 
 _MINIMUM_COLUMNS_STRICT = 30 # lesser than this can lead to breakage
 _INDENT = '  '
+_SPACE_RE = re.compile(r'(\$*) ')
 
 
 class _Writer(object):
-    def __init__(self, f, columns, strict):
-        self._f = f
+    """
+    Accumulates lines in a list, which is handed over to ``writelines`` in a single call when
+    flushed.
+    """
+
+    def __init__(self, writelines, columns, strict):
+        self._writelines = writelines
         self._columns = columns
         self._strict = strict
+        self._parts = []
 
     def __enter__(self):
         return self
     
     def __exit__(self, the_type, value, traceback):
-        pass
+        self.flush()
+
+    def flush(self):
+        if self._parts:
+            self._writelines(self._parts)
+            self._parts = []
     
     def line(self, line='', indent=0):
+        append = self._parts.append
         indentation = _INDENT * indent
-        if self._columns is None:
-            self._f.write('{}{}\n'.format(indentation, line))
-        else:
-            leading_space_length = len(indentation)
-            broken = False
-                
-            while leading_space_length + len(line) > self._columns:
-                width = self._columns - leading_space_length - 2
-                
-                # First try: find last un-escaped space within width 
-                space = width
-                while True:
-                    space = line.rfind(' ', 0, space)
-                    if (space < 0) or _Writer._is_unescaped(line, space):
-                        break                
-
-                # Second try (if non-strict): find first un-escaped space after width
-                if (space < 0) and (not self._strict):
-                    space = width - 1
-                    while True:
-                        space = line.find(' ', space + 1)
-                        if (space < 0) or _Writer._is_unescaped(line, space):
-                            break
-
-                if space != -1:
-                    # Break at space
-                    self._f.write('{}{} $\n'.format(indentation, line[:space]))
-                    line = line[space + 1:]
-                    if not broken:
-                        # Indent                               
-                        broken = True
-                        indentation += _INDENT
-                        leading_space_length += len(_INDENT)
-                elif self._strict:
-                    # Break anywhere
-                    width += 1
-                    self._f.write('{}{}$\n'.format(indentation, line[:width]))
-                    line = line[width:]
-                else:
-                    break
+        leading_space_length = len(indentation)
+        if (self._columns is None) or (leading_space_length + len(line) <= self._columns):
+            append(indentation + line + '\n')
+            return
 
-            self._f.write('{}{}\n'.format(indentation, line))
+        # Scan for all break candidates up front (again only after breaking anywhere); "start" is
+        # where the remaining line begins, and "first" is the index of the first candidate in it
+        spaces = _Writer._unescaped_spaces(line)
+        start = 0
+        first = 0
+        broken = False
+
+        while leading_space_length + len(line) - start > self._columns:
+            width = self._columns - leading_space_length - 2
+
+            # First try: find last un-escaped space within width
+            index = bisect_left(spaces, start + width, first)
+            if index > first:
+                index -= 1
+            elif self._strict:
+                index = -1
+            # Second try (if non-strict): find first un-escaped space after width
+            elif index == len(spaces):
+                index = -1
+
+            if index != -1:
+                # Break at space
+                space = spaces[index]
+                append(indentation + line[start:space] + ' $\n')
+                start = space + 1
+                first = index + 1
+                if not broken:
+                    # Indent
+                    broken = True
+                    indentation += _INDENT
+                    leading_space_length += len(_INDENT)
+            elif self._strict:
+                # Break anywhere
+                width += 1
+                append(indentation + line[start:start + width] + '$\n')
+                start += width
+                # The break might have split a run of "$", so we check escaping again from here
+                spaces = [start + space for space in _Writer._unescaped_spaces(line[start:])]
+                first = 0
+            else:
+                break
+
+        append(indentation + line[start:] + '\n')
 
     def comment(self, line):
+        append = self._parts.append
         if self._columns is None:
-            self._f.write('# {}\n'.format(line))
+            append('# ' + line + '\n')
         else:
             width = self._columns - 2
             lines = wrap(line, width, break_long_words=self._strict, break_on_hyphens=False)
             for line in lines:
-                self._f.write('# {}\n'.format(line))
-
-    @staticmethod        
-    def _is_unescaped(line, i):
-        dollar_count = 0
-        dollar_index = i - 1
-        while (dollar_index > 0) and (line[dollar_index] == '$'):
-            dollar_count += 1
-            dollar_index -= 1
-        return dollar_count % 2 == 0
+                append('# ' + line + '\n')
+
+    @staticmethod
+    def _unescaped_spaces(line):
+        # A space is escaped if it is preceded by an odd number of "$"
+        return [match.end(1) for match in _SPACE_RE.finditer(line) if len(match.group(1)) % 2 == 0]
@@ -265,8 +265,7 @@ class Phase(object):
         :rtype: (:obj:`bool`, [:class:`Output`])
         """
         
-        # Paths
-        input_path = self.input_path
+        # Paths (our input path is only needed as a fallback, see below)
         output_path = self.output_path
 
         # Filename changes
@@ -306,29 +305,32 @@ class Phase(object):
             else:
                 output_strip_prefix = stringify(self.output_strip_prefix)
             if output_strip_prefix is None:
-                output_strip_prefix = input_path
+                output_strip_prefix = self.input_path
             if not output_strip_prefix.endswith(os.sep):
                 output_strip_prefix += os.sep
             output_strip_prefix_length = len(output_strip_prefix)
     
-            outputs = []            
+            output_transform = self.output_transform
+
+            outputs = []
             for the_input in inputs:
-                output = the_input
-                
                 # Strip prefix
-                if output.startswith(output_strip_prefix):
-                    output = output[output_strip_prefix_length:]
+                if the_input.startswith(output_strip_prefix):
+                    output = the_input[output_strip_prefix_length:]
+                else:
+                    output = the_input
 
                 # Filename changes
                 if output_prefix:
                     p, f = os.path.split(output)
                     output = join_path(p, output_prefix + f)
-                output = change_extension(output, output_extension)
+                if output_extension is not None:
+                    output = change_extension(output, output_extension)
                 
                 output = join_path(output_path, output)
 
-                if self.output_transform:
-                    output = self.output_transform(output)
+                if output_transform:
+                    output = output_transform(output)
 
                 outputs.append(Output(output_path, output))
                 
@@ -15,9 +15,12 @@
 from __future__ import unicode_literals
 from ..contexts import current_context
 from ..extensions import Extension
-from ..utils.strings import stringify, UNESCAPED_STRING_RE
+from ..utils.strings import stringify, split_unescaped
 from ..utils.platform import which
 from subprocess import check_output, CalledProcessError
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from inspect import isclass
 import os
 
 
@@ -39,6 +42,7 @@ def configure_pkg_config(pkg_config_command=None,
     with current_context(False) as ctx:
         ctx.pkg_config.pkg_config_command = pkg_config_command or DEFAULT_PKG_CONFIG_COMMAND
         ctx.pkg_config.path = pkg_config_path
+        ctx.pkg_config._cache = {}
 
 
 class Package(Extension):
@@ -69,38 +73,135 @@ class Package(Extension):
         self.static = static
 
     def apply_to_executor_gcc_compile(self, executor):
-        _add_cflags_to_executor(executor, self._parse('--cflags'))
+        _add_cflags_to_executor(executor, self._parse(self._get_flags('gcc_compile')))
 
     def apply_to_executor_gcc_link(self, executor):
-        flags = ['--libs']
-        if self.static:
-            flags.append('--static')
-        _add_libs_to_executor(executor, self._parse(*flags))
+        _add_libs_to_executor(executor, self._parse(self._get_flags('gcc_link')))
 
-    def _parse(self, *flags):
-        original_pkg_config_path = os.environ.get('PKG_CONFIG_PATH', None)
-        try:
-            with current_context() as ctx:
-                default = os.environ.get('PKG_CONFIG', DEFAULT_PKG_CONFIG_COMMAND)
-                pkg_config_command = which(ctx.fallback(self.command,
-                                                        'pkg_config.pkg_config_command', default))
-                pkg_config_path = stringify(ctx.fallback(self.path, 'pkg_config.path'))
-                if pkg_config_path is not None:
-                    os.environ['PKG_CONFIG_PATH'] = pkg_config_path
+    def _get_flags(self, command_type):
+        if command_type == 'gcc_compile':
+            return ('--cflags',)
+        elif command_type == 'gcc_link':
+            return ('--libs', '--static') if self.static else ('--libs',)
+        return None
+
+    def _parse(self, flags):
+        cache, key = self._get_cache_key(flags)
+        values = cache.get(key)
+        if values is None:
+            pkg_config_command, pkg_config_path, name, flags, _ = key
+            values = _run_pkg_config(which(pkg_config_command), _get_env(pkg_config_path), name,
+                                     flags)
+            cache[key] = values
+        return values
+
+    def _get_cache_key(self, flags):
+        with current_context() as ctx:
+            default = os.environ.get('PKG_CONFIG', DEFAULT_PKG_CONFIG_COMMAND)
+            pkg_config_command = stringify(ctx.fallback(self.command,
+                                                        'pkg_config.pkg_config_command',
+                                                        default))
+            pkg_config_path = stringify(ctx.fallback(self.path, 'pkg_config.path'))
+            cache = ctx.get('pkg_config._cache')
+
+        if cache is None:
+            # Note that we can't store a new cache in the context, because it might be immutable
+            cache = _default_cache
+
+        # We key on the unresolved command, so a cache hit also skips "which", but then we must also
+        # key on PATH, which is what "which" depends on; likewise, without a configured path
+        # pkg-config inherits our PKG_CONFIG_PATH
+        environ = (os.environ.get('PATH'),
+                   os.environ.get('PKG_CONFIG_PATH') if pkg_config_path is None else None)
+        return cache, (pkg_config_command, pkg_config_path, stringify(self.name), flags, environ)
+
+
+def prefetch_packages(phases, processes=None):
+    """
+    Runs ``pkg-config`` concurrently for all the :class:`Package` extensions in the phases, caching
+    the results in the current context. Applying the extensions will then not have to wait for
+    ``pkg-config``.
+    
+    :param phases: phases
+    :type phases: [:class:`~ronin.phases.Phase`]
+    :param processes: maximum number of concurrent ``pkg-config`` processes; defaults to the number
+     of CPUs
+    :type processes: int
+    """
+
+    caches = {}
+    for phase in phases:
+        if phase.executor is None:
+            continue
+        for package in _get_packages(phase.extensions):
+            for command_type in phase.executor.command_types:
+                flags = package._get_flags(command_type)
+                if flags is not None:
+                    cache, key = package._get_cache_key(flags)
+                    if key not in cache:
+                        caches[key] = cache
+    if not caches:
+        return
+
+    # "which" needs the context, which is attached to our thread, so we call it here; we also
+    # prepare the environment just once for each path
+    keys = list(caches)
+    pkg_config_commands = {}
+    envs = {}
+    for pkg_config_command, pkg_config_path, _, _, _ in keys:
+        if pkg_config_command not in pkg_config_commands:
+            pkg_config_commands[pkg_config_command] = which(pkg_config_command)
+        if pkg_config_path not in envs:
+            envs[pkg_config_path] = _get_env(pkg_config_path)
     
-            args = [pkg_config_command]
-            for flag in flags:
-                args.append(flag)
-            args.append(stringify(self.name))
-     
-            try:
-                output = check_output(args).decode().strip()
-                return UNESCAPED_STRING_RE.split(output)
-            except CalledProcessError:
-                raise Exception("failed to run: '{}'".format(' '.join(args)))
+    def run(key):
+        pkg_config_command, pkg_config_path, name, flags, _ = key
+        return _run_pkg_config(pkg_config_commands[pkg_config_command], envs[pkg_config_path],
+                               name, flags)
+
+    if len(keys) == 1:
+        results = [run(keys[0])]
+    else:
+        pool = ThreadPool(min(processes or cpu_count(), len(keys)))
+        try:
+            results = pool.map(run, keys)
         finally:
-            if original_pkg_config_path is not None:
-                os.environ['PKG_CONFIG_PATH'] = original_pkg_config_path
+            pool.close()
+            pool.join()
+
+    for key, values in zip(keys, results):
+        caches[key][key] = values
+
+
+def _get_packages(extensions):
+    for extension in extensions:
+        if isinstance(extension, Package):
+            yield extension
+        if not isclass(extension):
+            for package in _get_packages(extension.extensions):
+                yield package
+
+
+def _get_env(pkg_config_path):
+    # Note that we do not modify os.environ, so that we can run concurrently
+    if pkg_config_path is None:
+        return None # inherit ours
+    env = os.environ.copy()
+    env['PKG_CONFIG_PATH'] = pkg_config_path
+    return env
+
+
+def _run_pkg_config(pkg_config_command, env, name, flags):
+    args = [pkg_config_command]
+    for flag in flags:
+        args.append(flag)
+    args.append(name)
+
+    try:
+        output = check_output(args, env=env).decode().strip()
+        return split_unescaped(output)
+    except CalledProcessError:
+        raise Exception("failed to run: '{}'".format(' '.join(args)))
 
 
 def _add_cflags_to_executor(executor, args):
@@ -122,3 +223,6 @@ def _add_libs_to_executor(executor, args):
             executor.add_library_path(value[2:])
         elif value.startswith('-l'):
             executor.add_library(value[2:])
+
+
+_default_cache = {} # for when pkg-config has not been configured in the context
@@ -16,9 +16,9 @@
 
 from __future__ import unicode_literals
 from .contexts import current_context
-from .utils.platform import host_platform, platform_executable_extension, \
-    platform_shared_library_extension, platform_shared_library_prefix
+from .utils.platform import host_platform, platform_strings
 from .utils.strings import stringify
+from .utils.unicode import to_str
 from .utils.paths import join_path
 from .utils.collections import StrictDict, StrictList
 
@@ -37,14 +37,16 @@ class Project(object):
     After setting up projects, they are usually handed over to :func:`~ronin.cli.cli`. Though, you
     can also use the :class:`~ronin.ninja.NinjaFile` class directly instead.
     
-    :ivar phases: phases
-    :vartype phases: {:obj:`str`: :class:`~ronin.phases.Phase`}
     :ivar hooks: called when generating the Ninja file
     :vartype hooks: [:obj:`~types.FunctionType`]
     :ivar run: executed in order after a successful build
     :vartype run: {:obj:`int`: [:obj:`str` or :obj:`~types.FunctionType`]}
     """
     
+    __slots__ = ('name', 'version', '_input_path', 'input_path_relative', '_output_path',
+                 'output_path_relative', 'file_name', '_phases', 'hooks', 'run', '_variant',
+                 '_variant_cache', '_platform_cache', '_str_cache')
+
     def __init__(self,
                  name,
                  version=None,
@@ -84,40 +86,129 @@ class Project(object):
         self.output_path = output_path
         self.output_path_relative = output_path_relative
         self.file_name = file_name
-        self.phases = StrictDict(phases, key_type=str, value_type='ronin.phases.Phase')
+        self.phases = PhasesDict(phases) if phases else None
         self.hooks = StrictList(value_type='types.FunctionType')
         self.run = StrictDict(key_type=int, value_type=list)
-        self._variant = variant or (lambda ctx: ctx.get('projects.default_variant',
-                                                        host_platform()))
+        self._set_variant(variant or _default_variant)
+        self._platform_cache = None
+        self._str_cache = None
+
+    @classmethod
+    def specialized(cls, name, variant, **kwargs):
+        """
+        Creates a project of a subclass specialized for the variant, in which :attr:`variant`,
+        :attr:`is_windows`, :attr:`is_linux`, :attr:`platform_strings`,
+        :attr:`executable_extension`, :attr:`shared_library_extension`, and
+        :attr:`shared_library_prefix` are constants. The variant can thus not be changed later.
+        
+        Subclasses are created once per variant.
+        
+        :param name: project name
+        :type name: str or ~types.FunctionType
+        :param variant: project variant; calls :func:`~ronin.utils.strings.stringify` on it
+         immediately
+        :type variant: str or ~types.FunctionType
+        :param kwargs: other arguments for the constructor
+        :returns: project
+        :rtype: :class:`Project`
+        """
+        
+        variant = stringify(variant)
+        variant = _KNOWN_VARIANTS.get(variant, variant)
+        key = (cls, variant)
+        specialized_class = _specialized_classes.get(key)
+        if specialized_class is None:
+            the_platform_strings = platform_strings(variant)
+            specialized_class = _specialized_classes[key] = type(cls.__name__, (cls,), {
+                '__slots__': (),
+                'variant': variant,
+                'is_windows': variant in _WINDOWS_VARIANTS,
+                'is_linux': variant in _LINUX_VARIANTS,
+                'platform_strings': the_platform_strings,
+                'executable_extension': the_platform_strings[0],
+                'shared_library_extension': the_platform_strings[1],
+                'shared_library_prefix': the_platform_strings[2]})
+        return specialized_class(name, variant=variant, **kwargs)
 
     def __str__(self):
         return self.__unicode__()
 
     def __unicode__(self):
         # Python 2
-        name = stringify(self.name)
-        version = stringify(self.version)
-        variant = stringify(self.variant)
-        if version and variant:
-            return '{name} {version} ({variant})'.format(name=name, version=version,
-                                                         variant=variant)
-        elif version and not variant:
-            return '{name} {version}'.format(name=name, version=version)
-        elif variant and not version:
-            return '{name} ({variant})'.format(name=name, variant=variant)
-        else:
-            return name
+        name = self.name
+        version = self.version
+        variant = self._variant_cache or self.variant
+
+        # Cached for as long as the values are the same (but we can't cache function results)
+        cache = self._str_cache
+        if (cache is not None) and (cache[0] is name) and (cache[1] is version) \
+            and (cache[2] is variant):
+            return cache[3]
+
+        # Plain strings don't need to be stringified
+        name_str = name if isinstance(name, to_str) else stringify(name)
+        version_str = version if isinstance(version, to_str) else stringify(version)
+        s = _STR_FORMATS[(bool(version_str), bool(variant))].format(name=name_str,
+                                                                    version=version_str,
+                                                                    variant=variant)
+        if not (hasattr(name, '__call__') or hasattr(version, '__call__')):
+            self._str_cache = (name, version, variant, s)
+        return s
 
     @property
     def variant(self):
         """
         Project variant.
         
+        The value is resolved once and then cached; see :meth:`invalidate_variant`.
+        
         :type: :obj:`str`
         """
         
-        return stringify(self._variant)
+        variant = self._variant_cache
+        if variant is None:
+            variant = stringify(self._variant)
+            # Use our own instance of known variants, so that comparing them to ours is quicker
+            variant = self._variant_cache = _KNOWN_VARIANTS.get(variant, variant)
+        return variant
+
+    @variant.setter
+    def variant(self, value):
+        self._set_variant(value)
+
+    def _set_variant(self, value):
+        self._variant = value
+        if isinstance(value, to_str):
+            # Plain strings don't need to be stringified
+            self._variant_cache = _KNOWN_VARIANTS.get(value, value)
+        else:
+            self._variant_cache = None
+
+    def invalidate_variant(self):
+        """
+        Makes sure that :attr:`variant` will be resolved again the next time it is accessed. Call
+        this if the variant is a function that depends on values in the context which have since
+        changed (such as ``projects.default_variant``).
+        """
+        
+        self._variant_cache = None
     
+    @property
+    def phases(self):
+        """
+        Project phases. Allocated when first accessed.
+        
+        :type: :class:`PhasesDict`
+        """
+        
+        if self._phases is None:
+            self._phases = PhasesDict()
+        return self._phases
+
+    @phases.setter
+    def phases(self, value):
+        self._phases = value
+
     @property
     def is_windows(self):
         """
@@ -126,7 +217,7 @@ class Project(object):
         :type: :obj:`bool`
         """
 
-        return self.variant in ('win64', 'win32')
+        return (self._variant_cache or self.variant) in _WINDOWS_VARIANTS
 
     @property
     def is_linux(self):
@@ -136,7 +227,24 @@ class Project(object):
         :type: :obj:`bool`
         """
 
-        return self.variant in ('linux64', 'linux32')
+        return (self._variant_cache or self.variant) in _LINUX_VARIANTS
+
+    @property
+    def platform_strings(self):
+        """
+        The executable extension, shared library extension, and shared library prefix for the
+        :attr:`variant`, all at once. Cached for as long as the variant does not change.
+        
+        See: :func:`~ronin.utils.platform.platform_strings`.
+        
+        :type: (:obj:`str`, :obj:`str`, :obj:`str`)
+        """
+        
+        variant = self._variant_cache or self.variant
+        cache = self._platform_cache
+        if (cache is None) or (cache[0] != variant):
+            cache = self._platform_cache = (variant, platform_strings(variant))
+        return cache[1]
 
     @property
     def executable_extension(self):
@@ -148,7 +256,7 @@ class Project(object):
         :type: :obj:`str`
         """
         
-        return platform_executable_extension(self.variant)
+        return self.platform_strings[0]
     
     @property
     def shared_library_extension(self):
@@ -160,7 +268,7 @@ class Project(object):
         :type: :obj:`str`
         """
 
-        return platform_shared_library_extension(self.variant)
+        return self.platform_strings[1]
 
     @property
     def shared_library_prefix(self):
@@ -172,7 +280,7 @@ class Project(object):
         :type: :obj:`str`
         """
 
-        return platform_shared_library_prefix(self.variant)
+        return self.platform_strings[2]
 
     @property
     def input_path(self):
@@ -240,7 +348,14 @@ class Project(object):
         :rtype: str
         """
         
-        for k, v in self.phases.items():
+        phases = self._phases
+        if phases is None:
+            return None
+        elif isinstance(phases, PhasesDict):
+            return phases.get_name(phase)
+
+        # Phases were set to another kind of dict
+        for k, v in phases.items():
             if v is phase:
                 return k
         return None
@@ -270,3 +385,90 @@ class Project(object):
             if p is None:
                 raise ValueError('"{}" in {} is not a phase in the project'.format(p_name, attr))
         return p_name, p
+
+
+class PhasesDict(StrictDict):
+    """
+    A :class:`~ronin.utils.collections.StrictDict` of phases by name, which also keeps track of
+    the name of each phase, so that it can be looked up quickly.
+    
+    :param items: initial dict
+    :type items: {:obj:`str`: :class:`~ronin.phases.Phase`}
+    """
+    
+    def __init__(self, items=None):
+        self._names = {} # phases by identity
+        super(PhasesDict, self).__init__(items, key_type=str, value_type='ronin.phases.Phase')
+
+    def get_name(self, phase):
+        """
+        The name of the phase if it's in the dict. If the phase was added under several names,
+        returns the first.
+        
+        :param phase: phase
+        :type phase: ~ronin.phases.Phase
+        :returns: phase name or ``None``
+        :rtype: str
+        """
+        
+        return self._names.get(id(phase))
+
+    def __setitem__(self, key, value, **_):
+        old_value = self.get(key)
+        super(PhasesDict, self).__setitem__(key, value)
+        if old_value is not None:
+            self._forget(key, old_value)
+        self._names.setdefault(id(value), key)
+
+    def __delitem__(self, key):
+        value = self.get(key)
+        super(PhasesDict, self).__delitem__(key)
+        if value is not None:
+            self._forget(key, value)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self.get(key)
+            del self[key]
+            return value
+        elif default:
+            return default[0]
+        raise KeyError(key)
+
+    def popitem(self, last=True):
+        key, value = super(PhasesDict, self).popitem(last)
+        self._forget(key, value)
+        return key, value
+
+    def clear(self):
+        super(PhasesDict, self).clear()
+        self._names.clear()
+
+    def _forget(self, key, value):
+        if self._names.get(id(value)) == key:
+            del self._names[id(value)]
+            # The phase might still be here under another name
+            for k, v in self.items():
+                if (v is value) and (k != key):
+                    self._names[id(value)] = k
+                    break
+
+
+def _default_variant(ctx):
+    return ctx.get('projects.default_variant', _HOST_PLATFORM)
+
+
+_HOST_PLATFORM = host_platform() # does not change while we are running
+
+_WINDOWS_VARIANTS = frozenset(('win64', 'win32'))
+_LINUX_VARIANTS = frozenset(('linux64', 'linux32'))
+_KNOWN_VARIANTS = {v: v for v in _WINDOWS_VARIANTS | _LINUX_VARIANTS}
+
+_specialized_classes = {}
+
+# Keyed by whether there is a version and whether there is a variant
+_STR_FORMATS = {
+    (True, True): '{name} {version} ({variant})',
+    (True, False): '{name} {version}',
+    (False, True): '{name} ({variant})',
+    (False, False): '{name}'}
@@ -16,7 +16,7 @@ from __future__ import unicode_literals
 from ..contexts import current_context
 from ..extensions import Extension
 from ..pkg_config import _add_cflags_to_executor, _add_libs_to_executor
-from ..utils.strings import stringify, bool_stringify, UNESCAPED_STRING_RE
+from ..utils.strings import stringify, bool_stringify, split_unescaped
 from ..utils.platform import which
 from subprocess import check_output, CalledProcessError
 
@@ -99,6 +99,6 @@ class SDL(Extension):
         
         try:
             output = check_output(args).decode().strip()
-            return UNESCAPED_STRING_RE.split(output)
+            return split_unescaped(output)
         except CalledProcessError:
             raise Exception("failed to run: '{}'".format(' '.join(args)))
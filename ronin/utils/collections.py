@@ -183,13 +183,17 @@ def _convert_type(the_type):
     if isinstance(the_type, tuple):
         return tuple(_convert_type(v) for v in the_type)
     elif isinstance(the_type, string):
-        the_type = import_symbol(the_type)
+        # Strict collections are created often (every context has some), so we import just once
+        imported_type = _imported_types.get(the_type)
+        if imported_type is None:
+            imported_type = _imported_types[the_type] = import_symbol(the_type)
+        the_type = imported_type
     if not isclass(the_type):
         raise ValueError('{} is not a type'.format(the_type))
     if the_type is str:
-        try:
-            # Needed for Python 2 so we can support both "str" and "unicode" types
-            the_type = basestring
-        except NameError:
-            pass
+        # Needed for Python 2 so we can support both "str" and "unicode" types
+        the_type = string
     return the_type
+
+
+_imported_types = {}
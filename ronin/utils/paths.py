@@ -15,8 +15,14 @@
 from __future__ import unicode_literals
 from .strings import stringify, stringify_list
 from ..contexts import current_context
-from glob2 import glob as glob2
-import os
+from fnmatch import fnmatch
+import os, re
+
+try:
+    from os import scandir
+except ImportError:
+    # Python 2
+    scandir = None
 
 
 def join_path(*segments):
@@ -94,7 +100,7 @@ def glob(pattern, path=None, hidden=False, dirs=False):
     zero or more path segments.
     
     Note that this implementation improves on Python's standard :func:`glob.glob` by supporting
-    "\*\*" correctly.
+    "\*\*" correctly. Results are sorted.
     
     :param pattern: pattern; calls :func:`ronin.utils.strings.stringify` on it
     :type pattern: str|FunctionType
@@ -112,10 +118,8 @@ def glob(pattern, path=None, hidden=False, dirs=False):
     if path is None:
         with current_context() as ctx:
             path = ctx.get('paths.input')
-    paths = glob2(join_path(path, pattern), include_hidden=hidden)
-    if not dirs:
-        paths = [v for v in paths if not os.path.isdir(v)]
-    return paths
+    paths = _glob(join_path(path, pattern), hidden)
+    return sorted(v for v, is_dir in paths if dirs or not is_dir)
 
 
 def change_extension(path, new_extension):
@@ -141,3 +145,94 @@ def change_extension(path, new_extension):
     if dot != -1:
         path = path[:dot]
     return '{}.{}'.format(path, new_extension)
+
+
+_MAGIC_RE = re.compile(r'[*?[]')
+
+
+def _glob(pattern, hidden):
+    # Yields (path, is_dir)
+    if os.altsep:
+        # Windows accepts both separators, and patterns are usually written with "/"
+        pattern = pattern.replace(os.altsep, os.sep)
+    drive, pattern = os.path.splitdrive(pattern)
+    segments = pattern.split(os.sep)
+    
+    # Start at the longest literal prefix
+    index = 0
+    while (index < len(segments)) and (not _MAGIC_RE.search(segments[index])):
+        index += 1
+    if index == len(segments):
+        pattern = drive + pattern
+        if os.path.lexists(pattern):
+            yield pattern, os.path.isdir(pattern)
+        return
+    base = os.sep.join(segments[:index])
+    if (not base) and pattern.startswith(os.sep):
+        base = os.sep
+    base = drive + base
+
+    for v in _glob_segments(base, segments[index:], hidden):
+        yield v
+
+
+def _glob_segments(base, segments, hidden):
+    segment = segments[0]
+    rest = segments[1:]
+    if segment == '**':
+        # Zero segments
+        if rest:
+            for v in _glob_segments(base, rest, hidden):
+                yield v
+        
+        # One or more segments (we do not recurse into symbolic links)
+        for name, is_dir, is_link in _list_dir(base, hidden):
+            path = _join(base, name)
+            if not rest:
+                yield path, is_dir
+            if is_dir and not (is_link and not rest):
+                for v in _glob_segments(path, rest if is_link else segments, hidden):
+                    yield v
+    elif _MAGIC_RE.search(segment):
+        for name, is_dir, _ in _list_dir(base, hidden or segment.startswith('.')):
+            if fnmatch(name, segment):
+                path = _join(base, name)
+                if not rest:
+                    yield path, is_dir
+                elif is_dir:
+                    for v in _glob_segments(path, rest, hidden):
+                        yield v
+    else:
+        path = _join(base, segment)
+        if not rest:
+            if os.path.lexists(path):
+                yield path, os.path.isdir(path)
+        elif os.path.isdir(path):
+            for v in _glob_segments(path, rest, hidden):
+                yield v
+
+
+def _list_dir(path, hidden):
+    # Returns [(name, is_dir, is_link)]; os.scandir lets us avoid stat calls
+    try:
+        if scandir is not None:
+            entries = [(entry.name, entry.is_dir(), entry.is_symlink())
+                       for entry in scandir(path or os.curdir)]
+        else:
+            entries = []
+            for name in os.listdir(path or os.curdir):
+                the_path = _join(path, name)
+                entries.append((name, os.path.isdir(the_path), os.path.islink(the_path)))
+    except OSError:
+        return []
+    if not hidden:
+        entries = [v for v in entries if not v[0].startswith('.')]
+    return entries
+
+
+def _join(path, name):
+    if not path:
+        return name
+    elif path.endswith(os.sep):
+        return path + name
+    return path + os.sep + name
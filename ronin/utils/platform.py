@@ -17,7 +17,7 @@ from __future__ import absolute_import # so we can import 'platform'
 from .strings import stringify
 from ..contexts import current_context
 from subprocess import check_output, CalledProcessError
-import sys, platform
+import sys, os, platform
 
 
 DEFAULT_WHICH_COMMAND = '/usr/bin/which'
@@ -42,7 +42,7 @@ def configure_platform(prefixes=None, which_command=None):
     
     with current_context(False) as ctx:
         ctx.platform.prefixes = DEFAULT_PLATFORM_PREFIXES.copy()
-        if platform_prefixes:
+        if prefixes:
             ctx.platform.prefixes.update(prefixes)
         ctx.platform.which_command = which_command or DEFAULT_WHICH_COMMAND
 
@@ -74,10 +74,7 @@ def platform_executable_extension(platform):
     :rtype: str
     """
     
-    platform = stringify(platform)
-    if platform in ('win64', 'win32'):
-        return 'exe'
-    return None
+    return platform_strings(platform)[0]
 
 
 def platform_shared_library_extension(platform):
@@ -91,10 +88,7 @@ def platform_shared_library_extension(platform):
     :rtype: str
     """
 
-    platform = stringify(platform)
-    if platform in ('win64', 'win32'):
-        return 'dll'
-    return 'so'
+    return platform_strings(platform)[1]
 
 
 def platform_shared_library_prefix(platform):
@@ -107,10 +101,26 @@ def platform_shared_library_prefix(platform):
     :rtype: str
     """
 
+    return platform_strings(platform)[2]
+
+
+def platform_strings(platform):
+    """
+    The executable extension, shared library extension, and shared library prefix for the
+    platform, as returned by :func:`platform_executable_extension`,
+    :func:`platform_shared_library_extension`, and :func:`platform_shared_library_prefix`, but
+    all at once.
+    
+    :param platform: platform
+    :type platform: str|FunctionType
+    :returns: executable extension or None, shared library extension, shared library prefix or None
+    :rtype: (str, str, str)
+    """
+
     platform = stringify(platform)
     if platform in ('win64', 'win32'):
-        return None
-    return 'lib'
+        return _WINDOWS_PLATFORM_STRINGS
+    return _OTHER_PLATFORM_STRINGS
 
 
 def platform_prefixes():
@@ -183,7 +193,8 @@ def which(command, exception=True):
     Finds the absolute path to a command on this host machine.
     
     Works by invoking the operating system's ``which`` command, which configured via the context's
-    ``platform.which_command``. See also :func:`configure_which`.
+    ``platform.which_command``. See also :func:`configure_which`. Results are cached for as long
+    as ``PATH`` does not change.
 
     :param command: command
     :type command: str|FunctionType
@@ -197,20 +208,24 @@ def which(command, exception=True):
     """
 
     command = stringify(command)
-    try:
-        with current_context() as ctx:
-            which_command = ctx.get('platform.which_command', DEFAULT_WHICH_COMMAND)
-            which_command = stringify(which_command)
-        found_command = check_output([which_command, command])
-        if not found_command:
-            if exception:
-                raise WhichException("could not find '{}'".format(command))
-            return None
-        return found_command.decode().strip()
-    except CalledProcessError:
-        if exception:
-            raise WhichException("could not find '{}'".format(command))
-        return None
+    with current_context() as ctx:
+        which_command = ctx.get('platform.which_command', DEFAULT_WHICH_COMMAND)
+        which_command = stringify(which_command)
+
+    # The result can only change if PATH changes
+    key = (which_command, command, os.environ.get('PATH'))
+    if key in _which_cache:
+        found_command = _which_cache[key]
+    else:
+        try:
+            found_command = check_output([which_command, command]).decode().strip() or None
+        except CalledProcessError:
+            found_command = None
+        _which_cache[key] = found_command
+
+    if (found_command is None) and exception:
+        raise WhichException("could not find '{}'".format(command))
+    return found_command
 
 
 class WhichException(Exception):
@@ -222,6 +237,9 @@ class WhichException(Exception):
         super(WhichException, self).__init__(message)
 
 
+_which_cache = {}
+
+
 # See: https://docs.python.org/2/library/sys.html#sys.platform
 _OPERATING_SYSTEMS_PREFIXES = {
     'linux2': 'linux',
@@ -231,3 +249,6 @@ _OPERATING_SYSTEMS_PREFIXES = {
     'os2':    'os2_', # underscore to separate from bits
     'riscos': 'riscos',
     'atheos': 'atheos'}
+
+_WINDOWS_PLATFORM_STRINGS = ('exe', 'dll', None)
+_OTHER_PLATFORM_STRINGS = (None, 'so', 'lib')
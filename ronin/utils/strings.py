@@ -137,3 +137,20 @@ def format_later(the_format, *args, **kwargs):
     """
     
     return lambda _: stringify(the_format).format(*stringify_list(args), **stringify_dict(kwargs)) 
+
+
+def split_unescaped(value):
+    """
+    Splits the string on spaces that are not escaped with a backslash, as in the output of
+    ``pkg-config`` and similar tools. Escaped spaces are kept as they are.
+    
+    :param value: value
+    :type value: str
+    :returns: split values
+    :rtype: [str]
+    """
+    
+    if '\\' not in value:
+        # No escapes, so we can avoid the regular expression
+        return value.split(' ')
+    return UNESCAPED_STRING_RE.split(value)